@@ -1,224 +1,356 @@
 #!/usr/bin/python
 # vim: ts=4 sw=4 et
-"""Simple Subnetting Class."""
+"""Simple Subnetting Module."""
+import functools
+import re
+import socket
+import struct
+
+
+def _ip2bytes(ipaddr):
+    """Packs a dotted-quad ip address into 4 bytes."""
+    # inet_aton also accepts octal, hex and shortened addresses
+    try:
+        return socket.inet_pton(socket.AF_INET, ipaddr)
+    except socket.error:
+        raise ValueError('invalid ip address: %r' % (ipaddr,)) from None
+
+
+def _ip2int(ipaddr):
+    """Packs a dotted-quad ip address into a 32 bit integer."""
+    return struct.unpack('!I', _ip2bytes(ipaddr))[0]
+
+
+def _int2ip(num):
+    """Unpacks a 32 bit integer into a dotted-quad ip address."""
+    return socket.inet_ntoa(struct.pack('!I', num))
+
+
+if hasattr(int, 'bit_count'):
+    def _popcount(num):
+        """Counts the number of ones in an integer."""
+        return num.bit_count()
+# python < 3.10
+else:
+    def _popcount(num):
+        """Counts the number of ones in an integer."""
+        return bin(num).count('1')
+
+
+# netmasks for every cidr notation, indexed by cidr
+_CIDR_TABLE = [((1 << cidr) - 1) << (32 - cidr) for cidr in range(33)]
+_CIDR_STR = [_int2ip(mask) for mask in _CIDR_TABLE]
+
+# binary strings for every octet, indexed by octet
+_BIN8 = tuple('{0:08b}'.format(octet) for octet in range(256))
+
+# cidr notation as one or two ascii digits
+_CIDR_RE = re.compile(r'\A[0-9]{1,2}\Z')
+
+
+def _normalize_mask(netmask):
+    """
+    Converts a netmask in cidr notation or dotted-quad format into a 32 bit
+    integer.
+
+    Args:
+        netmask (str): A netmask
+                       format: 24 or 255.255.255.0
+
+    Returns:
+        mask (int): The netmask as a 32 bit integer
+
+    Raises:
+       ValueError if format is invalid
+    """
+    # cidr notation
+    if '.' not in netmask:
+        if not _CIDR_RE.match(netmask) or int(netmask) > 32:
+            raise ValueError('invalid cidr notation: %r' % (netmask,))
+        return _CIDR_TABLE[int(netmask)]
+
+    return _ip2int(netmask)
+
+
+def _parse(ipaddr):
+    """
+    Splits an ip address and netmask into a pair of 32 bit integers.
+
+    Args:
+        ipaddr (str): An ip address and netmask
+                      format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
+
+    Returns:
+        tuple (int): A tuple containing the ip address and netmask
+
+    Raises:
+       ValueError if format is invalid
+    """
+    addr, netmask = ipaddr.split('/', 1)
+    return _ip2int(addr), _normalize_mask(netmask)
+
+
+def _network_int(addr, mask):
+    """Returns the network of an ip address and netmask as an integer."""
+    return addr & mask
+
+
+def _broadcast_int(addr, mask):
+    """Returns the broadcast of an ip address and netmask as an integer."""
+    return addr | (~mask & 0xFFFFFFFF)
+
+
+# pylint: disable=import-outside-toplevel
+@functools.lru_cache(maxsize=None)
+def _load_numpy():
+    """Imports numpy on first use, returns None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@functools.lru_cache(maxsize=None)
+def _load_batch_contains_jit():
+    """Compiles the kernel on first use, returns None without numba."""
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(parallel=True, cache=True)(_batch_contains_kernel)
+# pylint: enable=import-outside-toplevel
+
+
+def _batch_contains_kernel(ips, net, mask):
+    """Membership test over a numpy uint32 array, see batch_contains."""
+    return (ips & mask) == net
+
+
+def batch_contains(ips, net, mask):
+    """
+    Checks if each ip address is in a network, returning a numpy bool array.
+    Unlike isipaddrnet, the network and broadcast addresses are included. The
+    check is compiled with numba when it is installed and vectorised with
+    numpy otherwise.
+
+    Args:
+        ips (list): ip addresses as 32 bit integers, any sequence or array
+        net (int): The network as a 32 bit integer, already masked
+        mask (int): The netmask as a 32 bit integer
+
+    Returns:
+        numpy.ndarray (bool): True or False for each ip address
+
+    Raises:
+       ImportError if numpy is not installed
+    """
+    numpy = _load_numpy()
+    if numpy is None:
+        raise ImportError('batch_contains requires numpy')
+
+    ips = numpy.asarray(ips, dtype=numpy.uint32)
+    kernel = _load_batch_contains_jit() or _batch_contains_kernel
+    return kernel(ips, net, mask)
+
+
+@functools.lru_cache(maxsize=64)
+def magic_number(netmask):
+    """
+    Returns the magic number for subnetting. The magic number is calculated
+    by finding the first octet that does not equal 255, and substracting
+    256 from it. It also returns the octet that matched.
+
+    Args:
+        netmask (str): The netmask in string format
+
+    Returns:
+        tuple (int): A tuple containing the magic number and matching octet
+    """
+    for num, octet in enumerate(_ip2bytes(netmask)):
+        if octet != 255:
+            return (256 - octet, num)
+
+
+@functools.lru_cache(maxsize=64)
+def cidr2netmask(cidr):
+    """
+    Converts a cidr notation into a netmask. The netmasks are precomputed
+    for every cidr notation, so this is a table lookup.
+
+    Args:
+        cidr (int): A cidr notation of a netmask
+
+    Returns:
+        netmask (str): A netmask in string format
+    """
+    cidr = int(cidr)
+    if 0 <= cidr <= 32:
+        return _CIDR_STR[cidr]
+
+
+def netmask2cidr(netmask):
+    """
+    Converts netmask to cidr notation. It converts the value to an integer
+    and counts the number of ones.
+
+    Args:
+        netmask (str): The netmask in string format
+
+    Returns:
+        cidr (int): The cidr notation for a given netmask
+    """
+    return _popcount(_ip2int(netmask))
+
+
+def ipaddr2bin(ipaddr, fmt=''):
+    """
+    Returns ipaddr in binary format.
+
+    Args:
+        ipaddr (str): ip address in string format
+        fmt (str): A format string for joining the ip octets
+
+    Returns:
+        binary (str): ip address converted to binary
+
+    Raises:
+       ValueError if format is invalid
+    """
+    return fmt.join(_BIN8[octet] for octet in _ip2bytes(ipaddr))
+
+
+def bin2ipaddr(binary):
+    """
+    Converts ip address in binary to string
+
+    Args:
+        binary (str): ip address converted to binary
+
+    Returns:
+        ipaddr (str): ip address in string format
+
+    Raises:
+       ValueError if format is invalid
+    """
+    # only 32 bit strings of ones and zeroes
+    if len(binary) != 32 or binary.strip('01'):
+        raise ValueError('invalid binary ip address: %r' % (binary,))
+
+    return _int2ip(int(binary, 2))
+
+
+def network(ipaddr):
+    """
+    Returns network of given ip address and netmask
+
+    Args:
+        ipaddr (str): An ip address and netmask
+                      format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
+    Returns:
+        broadcast (str): A broadcast address
+    """
+    return _int2ip(_network_int(*_parse(ipaddr)))
+
+
+def broadcast(ipaddr):
+    """
+    Returns broadcast of given ip address and netmask
+
+    Args:
+        ipaddr (str): An ip address and netmask
+                      format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
+    Returns:
+        broadcast (str): A broadcast address
+    """
+    return _int2ip(_broadcast_int(*_parse(ipaddr)))
+
+
+@functools.lru_cache(maxsize=64)
+def wildcard(netmask):
+    """
+    Returns wildcard netmask from netmask. This is the inverse of the
+    subnet mask.
+
+    Args:
+        netmask (str): A netmask
+    """
+    return _int2ip(~_ip2int(netmask) & 0xFFFFFFFF)
+
+
+# keyword name is kept for compatibility with Subnetting.isipaddrnet
+def isipaddrnet(ipaddr, network):  # pylint: disable=redefined-outer-name
+    """
+    This function will determine if the ip address is a valid host address
+    within the network, excluding the network and broadcast addresses.
+
+    Args:
+        ipaddr (str): An ip address
+                      format: 1.2.3.4
+        network (str): An ip address and netmask
+                      format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
+
+    Returns:
+        boolean: True or False
+    """
+    ip_int = _ip2int(ipaddr)
+    addr, mask = _parse(network)
+    net = _network_int(addr, mask)
+
+    # the network and broadcast are not valid unless it is a host network
+    return (ip_int & mask) == net and (
+        mask == 0xFFFFFFFF or
+        ip_int not in (net, _broadcast_int(addr, mask)))
+
+
+def hosts(ipaddr, as_array=False):
+    """
+    Returns every valid host address of the network as 32 bit integers. These
+    are the addresses isipaddrnet accepts, which excludes the network and
+    broadcast addresses unless it is a host network. Note that batch_contains
+    does match the network and broadcast addresses.
+
+    Args:
+        ipaddr (str): An ip address and netmask
+                      format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
+        as_array (bool): Return a numpy uint32 array instead of a range. The
+                         array is allocated up front at 4 bytes per host, so
+                         a /8 takes 64 MiB and a /0 takes 16 GiB
+
+    Returns:
+        hosts (range): A lazy range of host addresses
+                       (a numpy.ndarray of uint32 when as_array is True)
+
+    Raises:
+       ImportError if as_array is True and numpy is not installed
+    """
+    addr, mask = _parse(ipaddr)
+    first = _network_int(addr, mask)
+    last = _broadcast_int(addr, mask)
+
+    if mask != 0xFFFFFFFF:
+        first += 1
+        last -= 1
+
+    if not as_array:
+        return range(first, last + 1)
+
+    numpy = _load_numpy()
+    if numpy is None:
+        raise ImportError('hosts with as_array requires numpy')
+
+    return numpy.arange(first, last + 1, dtype=numpy.uint32)
+
+
 class Subnetting(object):
-    """ This class with handle easy subnetting."""
-    def __init__(self):
-        pass
-
-    @staticmethod
-    def magic_number(netmask):
-        """
-        Returns the magic number for subnetting. The magic number is calculated
-        by finding the first octet that does not equal 255, and substracting
-        256 from it. It also returns the octet that matched.
-
-        Args:
-            netmask (str): The netmask in string format
-
-        Returns:
-            tuple (int): A tuple containing the magic number and matching octet
-        """
-        for num, octet in enumerate(netmask.split('.')):
-            if int(octet) != 255:
-                return (256 - int(octet), num)
-
-    def cidr2netmask(self, cidr):
-        """
-        Converts a cidr notation into a netmask. It converts the value into ones
-        and then pads the rest with zeroes to make a 32 bit string.
-
-        Args:
-            cidr (int): A cidr notation of a netmask
-
-        Returns:
-            netmask (str): A netmask in string format
-        """
-        binary = ''
-        if int(cidr) <= 32:
-            for dummy in range(int(cidr)):
-                binary += '1'
-
-            return self.bin2ipaddr(binary.ljust(32, '0'))
-
-    def netmask2cidr(self, netmask):
-        """
-        Converts netmask to cidr notation. It converts the value to binary
-        and counts the number of ones.
-
-        Args:
-            netmask (str): The netmask in string format
-
-        Returns:
-            cidr (int): The cidr notation for a given netmask
-        """
-        count = 0
-        for num in self.ipaddr2bin(netmask):
-            if int(num) == 1:
-                count += 1
-
-        return count
-
-    @staticmethod
-    def ipaddr2bin(ipaddr, fmt=''):
-        """
-        Returns ipaddr in binary format.
-
-        Args:
-            ipaddr (str): ip address in string format
-            fmt (str): A format string for joining the ip octets
-
-        Returns:
-            binary (str): ip address converted to binary
-
-        Raises:
-           ValueError if format is invalid
-        """
-        try:
-            return fmt.join(format(int(x), '08b') for x in ipaddr.split('.'))
-        except ValueError as err:
-            return err.message
-
-    @staticmethod
-    def bin2ipaddr(binary):
-        """
-        Converts ip address in binary to string
-
-        Args:
-            binary (str): ip address converted to binary
-
-        Returns:
-            ipaddr (str): ip address in string format
-
-        Raises:
-           ValueError if format is invalid
-        """
-        # split the binary into 8 bit segments
-        octets = [binary[i:i+8] for i in range(0, len(binary), 8)]
-
-        try:
-            return '.'.join(str(int(octet, 2)) for octet in octets)
-        except ValueError as err:
-            return err.message
-
-    def network(self, ipaddr):
-        """
-        Returns network of given ip address and netmask
-
-        Args:
-            ipaddr (str): An ip address and netmask
-                          format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
-        Returns:
-            broadcast (str): A broadcast address
-        """
-        addr, netmask = ipaddr.split('/')
-        # cidr notation
-        if len(str(netmask)) <= 2:
-            bin_netmask = self.cidr2netmask(netmask)
-            bin_netmask = self.ipaddr2bin(bin_netmask)
-            bin_ipaddr = self.ipaddr2bin(addr)
-            network = []
-        # netmask
-        else:
-            bin_netmask = self.ipaddr2bin(netmask)
-            bin_ipaddr = self.ipaddr2bin(addr)
-            network = []
-
-        # bitwise AND
-        for ipaddr_num, netmask_num in zip(bin_ipaddr, bin_netmask):
-            network.append(int(ipaddr_num) & int(netmask_num))
-
-        return self.bin2ipaddr(''.join(str(item) for item in network))
-
-    def broadcast(self, ipaddr):
-        """
-        Returns broadcast of given ip address and netmask
-
-        Args:
-            ipaddr (str): An ip address and netmask
-                          format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
-        Returns:
-            broadcast (str): A broadcast address
-        """
-        addr, netmask = ipaddr.split('/')
-        # cidr notation
-        if len(str(netmask)) <= 2:
-            bin_netmask = self.cidr2netmask(netmask)
-            bin_netmask = self.ipaddr2bin(bin_netmask)
-            # need to inverse the bits for broadcast
-            bin_netmask = ''.join('1' if x == '0' else '0' for x in bin_netmask)
-            bin_ipaddr = self.ipaddr2bin(addr)
-            network = []
-        # netmask
-        else:
-            bin_netmask = self.ipaddr2bin(netmask)
-            # need to inverse the bits for broadcast
-            bin_netmask = ''.join('1' if x == '0' else '0' for x in bin_netmask)
-            bin_ipaddr = self.ipaddr2bin(addr)
-            network = []
-
-        # bitwise OR
-        for ipaddr_num, netmask_num in zip(bin_ipaddr, bin_netmask):
-            network.append(int(ipaddr_num) | int(netmask_num))
-
-        return self.bin2ipaddr(''.join(str(item) for item in network))
-
-    def wildcard(self, netmask):
-        """
-        Returns wildcard netmask from netmask. This is the inverse of the
-        subnet mask.
-
-        Args:
-            netmask (str): A netmask
-        """
-        bin_netmask = self.ipaddr2bin(netmask)
-        binary = ''.join('0' if x == '1' else '1' for x in bin_netmask)
-        return self.bin2ipaddr(binary)
-
-    # pylint: disable=too-many-locals
-    def isipaddrnet(self, ipaddr, network):
-        """
-        This method will iterate the values within a select range to determine
-        if the ip address in the network.
-
-        Args:
-            ipaddr (str): An ip address
-                          format: 1.2.3.4
-            network (str): An ip address and netmask
-                          format: 1.2.3.4/24 or 1.2.3.4/255.255.255.0
-
-        Returns:
-            boolean: True or False
-        """
-        netmask = network.split('/')[1]
-        if int(netmask) <= 32:
-            netmask = self.cidr2netmask(netmask)
-            wildcard = self.wildcard(netmask)
-        else:
-            wildcard = self.wildcard(netmask)
-
-        net = self.network(network)
-        bcast = self.broadcast(network)
-
-        net_octets = net.split('.')
-        wildcard_octets = wildcard.split('.')
-        ipaddr_octets = ipaddr.split('.')
-        bcast_octets = bcast.split('.')
-
-        octets = (net_octets, ipaddr_octets, wildcard_octets, bcast_octets)
-
-        in_net = True
-
-        for n_octet, i_octet, w_octet, b_octet in zip(*octets):
-            # ip and net octets should be equal if wildcard is zero
-            if '0' in w_octet:
-                if not i_octet == n_octet:
-                    in_net = False
-            else:
-                # only check for valid ip address within network and broadcast
-                if (int(n_octet)+1) <= int(i_octet) <= (int(b_octet)-1):
-                    pass
-                else:
-                    in_net = False
-
-        return in_net
+    """ This class is kept for compatibility with the module functions."""
+    magic_number = staticmethod(magic_number)
+    cidr2netmask = staticmethod(cidr2netmask)
+    netmask2cidr = staticmethod(netmask2cidr)
+    ipaddr2bin = staticmethod(ipaddr2bin)
+    bin2ipaddr = staticmethod(bin2ipaddr)
+    network = staticmethod(network)
+    broadcast = staticmethod(broadcast)
+    wildcard = staticmethod(wildcard)
+    isipaddrnet = staticmethod(isipaddrnet)
+    hosts = staticmethod(hosts)